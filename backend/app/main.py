@@ -1,21 +1,65 @@
+"""
+FastAPI entry point for the AI Summarizer backend.
+
+Run with uvloop and httptools (both installed via requirements.txt):
+
+    uvicorn app.main:app --loop uvloop --http httptools --timeout-keep-alive 30
+
+In production, gunicorn's UvicornWorker selects uvloop and httptools
+automatically; keep-alive is set with gunicorn's --keep-alive flag.
+"""
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from .routers import summary_router
+from .services import batch_service
+from .services.llm_service import LLMService
 
 load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The service's HTTP client is created inside the running event loop
+    app.state.llm = LLMService()
+    await app.state.llm.startup()
+    
+    # Summary requests are queued and summarized in batches by a background task
+    app.state.summary_queue = asyncio.Queue()
+    app.state.summary_batcher = asyncio.create_task(batch_service.server_loop(app.state.summary_queue, app.state.llm))
+    
+    yield
+    
+    # Stop batching, settle every waiting request, and only then close the client
+    app.state.summary_batcher.cancel()
+    await asyncio.gather(app.state.summary_batcher, return_exceptions=True)
+    await batch_service.shutdown(app.state.summary_queue)
+    await app.state.llm.shutdown()
 
-# Configure CORS with environment variable support
-frontend_url = os.getenv("FRONTEND_URL", "http://localhost:5174")
-origins = [
-    frontend_url,
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Compress larger responses (long detailed/bullet summaries); added first so CORS stays outermost
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Configure CORS from the environment: CORS_ORIGINS (comma-separated) takes precedence,
+# then FRONTEND_URL; local dev servers are only allowed when neither is set
+DEV_ORIGINS = (
     "http://localhost:5173",  # Vite dev server default
     "http://localhost:5174",  # Vite dev server alternate
     "http://localhost:3000",  # React default
-]
+)
+cors_origins = os.getenv("CORS_ORIGINS")
+frontend_url = os.getenv("FRONTEND_URL")
+if cors_origins:
+    origins = tuple(origin.strip() for origin in cors_origins.split(",") if origin.strip())
+elif frontend_url:
+    origins = (frontend_url,)
+else:
+    origins = DEV_ORIGINS
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,85 +1,100 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Form
-from ..schemas.summary_schema import SummaryRequest, SummaryResponse, SummaryStyle
-from ..services.llm_service import llm_service
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Form, Request
+from ..schemas.summary_schema import SummaryRequest, SummaryResponse, SummaryStyle, require_custom_prompt
+from ..services.llm_service import LLMService, count_words
 from ..services.file_service import file_service
+from ..services import batch_service
+from ..services.cache_service import summary_cache
+from functools import lru_cache
 from typing import Optional
 
 router = APIRouter()
 
+_ALLOWED_TYPES = frozenset({"text/plain", "text/csv", "application/json"})
+_ALLOWED_EXTENSIONS = frozenset({".txt", ".csv", ".json"})
+_ALLOWED_EXTENSIONS_LABEL = ".txt, .csv, .json"
+
+def get_llm_service(request: Request) -> LLMService:
+    """The LLMService created by the app's lifespan."""
+    return request.app.state.llm
+
+async def _summarize(http_request: Request, text: str, style: SummaryStyle, custom_prompt: Optional[str], is_file_upload: bool) -> str:
+    """Return a cached summary, or queue the text for summarization and cache the result."""
+    cache_key = None
+    if len(text) <= summary_cache.MAX_TEXT_LENGTH:
+        cache_key = summary_cache.key(text, style, custom_prompt, is_file_upload)
+        summary = summary_cache.get(cache_key)
+        if summary is not None:
+            return summary
+    
+    summary = await batch_service.submit(
+        http_request.app.state.summary_queue,
+        text, style, custom_prompt, is_file_upload=is_file_upload
+    )
+    if cache_key is not None:
+        summary_cache.set(cache_key, summary)
+    return summary
+
 @router.post("/summarize", response_model=SummaryResponse)
-async def summarize_text(request: SummaryRequest):
+async def summarize_text(request: SummaryRequest, http_request: Request):
     if not request.text or not request.text.strip():
         raise HTTPException(status_code=400, detail="Text field cannot be empty")
     
-    # Validate custom prompt if custom style is selected
-    if request.style == SummaryStyle.CUSTOM and not request.custom_prompt:
-        raise HTTPException(
-            status_code=400, 
-            detail="custom_prompt is required when style is 'custom'"
-        )
-    
     # Text area input - is_file_upload=False
-    summary = llm_service.summarize(request.text, request.style, request.custom_prompt, is_file_upload=False)
+    summary = await _summarize(http_request, request.text, request.style, request.custom_prompt, is_file_upload=False)
     return SummaryResponse(
         summary=summary, 
         style=request.style.value, 
-        word_count=len(summary.split())
+        word_count=count_words(summary)
     )
 
 @router.post("/summarize-file", response_model=SummaryResponse)
 async def summarize_file(
+    http_request: Request,
     file: UploadFile = File(...), 
     style: SummaryStyle = Form(SummaryStyle.BRIEF),
     custom_prompt: Optional[str] = Form(None)
 ):
     # Validate file type - check both content_type and filename extension
-    allowed_types = ["text/plain", "text/csv", "application/json"]
-    allowed_extensions = [".txt", ".csv", ".json"]
-    
     file_extension = None
     if file.filename:
-        file_extension = "." + file.filename.split(".")[-1].lower() if "." in file.filename else None
+        _, dot, extension = file.filename.rpartition(".")
+        file_extension = "." + extension.lower() if dot else None
     
     # Check if either content type or extension is valid
     is_valid = (
-        file.content_type in allowed_types or 
-        file_extension in allowed_extensions or
+        file.content_type in _ALLOWED_TYPES or 
+        file_extension in _ALLOWED_EXTENSIONS or
         file.content_type is None  # Some clients don't send content_type
     )
     
     if not is_valid:
         raise HTTPException(
             status_code=400, 
-            detail=f"Unsupported file type. Allowed extensions: {', '.join(allowed_extensions)}"
+            detail=f"Unsupported file type. Allowed extensions: {_ALLOWED_EXTENSIONS_LABEL}"
         )
     
-    # Validate custom prompt if custom style is selected
-    if style == SummaryStyle.CUSTOM and not custom_prompt:
-        raise HTTPException(
-            status_code=400, 
-            detail="custom_prompt is required when style is 'custom'"
-        )
+    # Same rule SummaryRequest applies to JSON requests
+    require_custom_prompt(style, custom_prompt)
     
     content = await file_service.read_file(file)
     # File upload input - is_file_upload=True
-    summary = llm_service.summarize(content, style, custom_prompt, is_file_upload=True)
+    summary = await _summarize(http_request, content, style, custom_prompt, is_file_upload=True)
     return SummaryResponse(
         summary=summary, 
         style=style.value, 
-        word_count=len(summary.split())
+        word_count=count_words(summary)
     )
 
 @router.get("/health")
 def health_check():
     return {"status": "ok", "message": "Summarization API is running"}
 
-@router.get("/model-info")
-def get_model_info():
-    """Get information about the loaded models"""
+@lru_cache(maxsize=1)
+def _model_info(llm_service: LLMService) -> dict:
+    """Build the /model-info payload; the values are fixed once the service is created."""
     return {
-        "summarization_model": "facebook/bart-large-cnn",
-        "style_model": "google/flan-t5-base",
-        "available": llm_service.client is not None,
+        "summarization_model": llm_service.model,
+        "available": llm_service.hf_token is not None,
         "input_limits": {
             "text_area": {
                 "min_words": llm_service.text_area_min_words,
@@ -90,10 +105,10 @@ def get_model_info():
                 "max_words": llm_service.file_upload_max_words
             }
         },
-        "processing": {
-            "chunk_trigger_words": llm_service.chunk_trigger_words,
-            "token_chunk_size": f"{llm_service.min_tokens_per_chunk}-{llm_service.max_tokens_per_chunk} tokens",
-            "target_compression": f"{llm_service.target_compression_min*100}%-{llm_service.target_compression_max*100}%"
-        },
-        "supported_styles": ["brief", "detailed", "bullet_points", "custom"]
+        "supported_styles": [style.value for style in SummaryStyle]
     }
+
+@router.get("/model-info")
+def get_model_info(llm_service: LLMService = Depends(get_llm_service)):
+    """Get information about the loaded models"""
+    return _model_info(llm_service)
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict, ValidationInfo, field_validator
 from typing import Optional
 from enum import Enum
 
@@ -9,11 +10,37 @@ class SummaryStyle(str, Enum):
     STANDARD = "standard"  # Direct BART-CNN output
     CUSTOM = "custom"
 
+def require_custom_prompt(style: SummaryStyle, custom_prompt: Optional[str]):
+    """
+    Reject the custom style without a prompt with a 400.
+
+    Raised as an HTTPException rather than a ValueError so pydantic passes it
+    through unwrapped: the JSON and form endpoints answer with the same status
+    and string detail instead of a 422 validation error list.
+    """
+    if style == SummaryStyle.CUSTOM and not custom_prompt:
+        raise HTTPException(
+            status_code=400,
+            detail="custom_prompt is required when style is 'custom'"
+        )
+
 class SummaryRequest(BaseModel):
+    # Validate defaults too, so an omitted custom_prompt still reaches its validator
+    model_config = ConfigDict(validate_default=True)
+
     text: str
     style: SummaryStyle = SummaryStyle.BRIEF
     custom_prompt: Optional[str] = None  # For custom style
 
+    # A field validator's error echoes only the prompt, not the whole request text
+    @field_validator("custom_prompt")
+    @classmethod
+    def _require_custom_prompt(cls, custom_prompt: Optional[str], info: ValidationInfo):
+        style = info.data.get("style")  # missing if style itself failed validation
+        if style is not None:
+            require_custom_prompt(style, custom_prompt)
+        return custom_prompt
+
 class SummaryResponse(BaseModel):
     summary: str
     style: str
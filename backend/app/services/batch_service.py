@@ -0,0 +1,108 @@
+import asyncio
+import anyio
+from fastapi import HTTPException
+from .llm_service import LLMService
+
+MAX_BATCH_SIZE = 8
+MAX_DELAY = 0.1  # seconds to wait for more requests before dispatching a batch
+MAX_CONCURRENT_BATCHES = 4
+DRAIN_TIMEOUT = 10.0  # seconds shutdown waits for in-flight batches before cancelling them
+
+# Bounds how many batches call the model at once
+_SUMMARY_LIMITER = anyio.CapacityLimiter(MAX_CONCURRENT_BATCHES)
+
+# Keep references to in-flight batches so they are not garbage collected
+_pending_batches = set()
+
+
+def _reject(batch: list):
+    """Answer queued requests that will not be summarized because the server is stopping."""
+    for *_, response_q in batch:
+        response_q.put_nowait(HTTPException(status_code=503, detail="Server is shutting down"))
+
+
+async def _run_batch(llm: LLMService, batch: list):
+    """Summarize one batch and hand each result back to its waiting request."""
+    texts, styles, custom_prompts, is_file_uploads, response_qs = zip(*batch)
+    try:
+        async with _SUMMARY_LIMITER:
+            results = await llm.summarize_batch(
+                list(texts),
+                list(styles),
+                list(custom_prompts),
+                list(is_file_uploads)
+            )
+    except asyncio.CancelledError:
+        _reject(batch)
+        raise
+    except Exception as e:
+        print(f"Batch summarization error: {type(e).__name__}: {str(e)}")
+        results = [HTTPException(
+            status_code=502,
+            detail=f"Failed to generate summary: {str(e)}"
+        ) for _ in batch]
+
+    for response_q, result in zip(response_qs, results):
+        response_q.put_nowait(result)
+
+
+async def server_loop(queue: asyncio.Queue, llm: LLMService, max_batch_size: int = MAX_BATCH_SIZE, max_delay: float = MAX_DELAY):
+    """
+    Collect queued summary requests into batches and dispatch them to ``llm``.
+
+    Each queue item is ``(text, style, custom_prompt, is_file_upload, response_q)``.
+    A batch is dispatched once it holds ``max_batch_size`` items or ``max_delay``
+    seconds have passed since its first item arrived. A request that arrives
+    while nothing is queued or in flight is dispatched right away.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + max_delay
+
+        # Nothing to batch it with and no batch running: don't make it wait
+        idle = queue.empty() and not _pending_batches
+
+        try:
+            while not idle and len(batch) < max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            _reject(batch)
+            raise
+
+        task = asyncio.create_task(_run_batch(llm, batch))
+        _pending_batches.add(task)
+        task.add_done_callback(_pending_batches.discard)
+
+
+async def shutdown(queue: asyncio.Queue, timeout: float = DRAIN_TIMEOUT):
+    """
+    Finish in-flight batches and answer every request still waiting.
+
+    Call after cancelling ``server_loop``. Batches still running after
+    ``timeout`` seconds are cancelled, and requests left in ``queue`` get a 503.
+    """
+    if _pending_batches:
+        _, still_running = await asyncio.wait(set(_pending_batches), timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        await asyncio.gather(*still_running, return_exceptions=True)
+
+    _reject([queue.get_nowait() for _ in range(queue.qsize())])
+
+
+async def submit(queue: asyncio.Queue, text: str, style, custom_prompt=None, is_file_upload: bool = False) -> str:
+    """Queue a summary request and wait for its result."""
+    response_q = asyncio.Queue(maxsize=1)
+    await queue.put((text, style, custom_prompt, is_file_upload, response_q))
+    result = await response_q.get()
+
+    if isinstance(result, Exception):
+        raise result
+    return result
@@ -0,0 +1,40 @@
+import hashlib
+from cachetools import LRUCache
+from ..schemas.summary_schema import SummaryStyle
+
+
+class SummaryCache:
+    """
+    In-memory cache of finished summaries keyed by normalized input.
+    """
+
+    MAX_ENTRIES = 512
+    # Longer texts are not cached: building their key blocks the event loop, and at
+    # 50+ characters per word they are far past the 4000-word limit anyway
+    MAX_TEXT_LENGTH = 200_000
+
+    def __init__(self):
+        self._cache = LRUCache(maxsize=self.MAX_ENTRIES)
+
+    def key(self, text: str, style: SummaryStyle, custom_prompt: str = None, is_file_upload: bool = False) -> str:
+        """
+        Build a cache key for a summary request.
+
+        Whitespace is collapsed the same way preprocessing does it, so inputs
+        that differ only in spacing or line breaks share an entry. The input
+        source is part of the key because text area and file uploads have
+        different word limits.
+        """
+        normalized = " ".join(text.split())
+        parts = (normalized, style.value, custom_prompt or "", "file" if is_file_upload else "text")
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        return self._cache.get(key)
+
+    def set(self, key: str, summary: str):
+        self._cache[key] = summary
+
+
+# Singleton instance
+summary_cache = SummaryCache()
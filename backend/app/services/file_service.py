@@ -1,34 +1,51 @@
 from fastapi import UploadFile, HTTPException
-import io
+from starlette.concurrency import run_in_threadpool
 
 class FileService:
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    READ_CHUNK_SIZE = 64 * 1024  # 64KB
+    THREADED_DECODE_SIZE = 1024 * 1024  # Decode larger uploads off the event loop
+    
+    @staticmethod
+    def _decode(content) -> str:
+        """Decode text as UTF-8 (stripping any BOM), falling back to Latin-1."""
+        try:
+            return content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            # Latin-1 maps every byte, so legacy encodings (e.g. Windows-1252) still load
+            return content.decode("latin-1")
     
     async def read_file(self, file: UploadFile) -> str:
-        # Validate file size
-        content = await file.read()
+        try:
+            return await self._read_file(file)
+        finally:
+            await file.close()
+    
+    def _file_too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=400, 
+            detail=f"File too large. Maximum size is {self.MAX_FILE_SIZE / (1024*1024)}MB"
+        )
+    
+    async def _read_file(self, file: UploadFile) -> str:
+        # Reject by the size the upload reports before reading any bytes
+        if file.size is not None and file.size > self.MAX_FILE_SIZE:
+            raise self._file_too_large()
         
-        if len(content) > self.MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File too large. Maximum size is {self.MAX_FILE_SIZE / (1024*1024)}MB"
-            )
+        # Validate file size while streaming too, in case the size is unknown
+        content = bytearray()
+        while chunk := await file.read(self.READ_CHUNK_SIZE):
+            content.extend(chunk)
+            if len(content) > self.MAX_FILE_SIZE:
+                raise self._file_too_large()
         
         # Validate file is not empty
         if len(content) == 0:
             raise HTTPException(status_code=400, detail="File is empty")
         
         # Handle text files
-        try:
-            text = content.decode("utf-8")
-        except UnicodeDecodeError:
-            raise HTTPException(
-                status_code=400, 
-                detail="Could not decode file as UTF-8. Please upload a text file."
-            )
-        finally:
-            await file.close()
-        
-        return text
+        if len(content) > self.THREADED_DECODE_SIZE:
+            return await run_in_threadpool(self._decode, content)
+        return self._decode(content)
 
 file_service = FileService()
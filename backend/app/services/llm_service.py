@@ -1,34 +1,100 @@
+import asyncio
+import hashlib
 import os
+import random
 import re
-import requests
-from requests.exceptions import HTTPError, Timeout, RequestException
+import statistics
+import time
+import httpx
+import numpy as np
+import orjson
+from cachetools import LRUCache
+from collections import deque
+from functools import lru_cache
 from dotenv import load_dotenv
 from fastapi import HTTPException
 
+from ..schemas.summary_schema import SummaryStyle
+
+load_dotenv()
+
 try:
-    import nltk
-    from nltk.tokenize import sent_tokenize
-    try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        nltk.download('punkt', quiet=True)
-    try:
-        nltk.data.find('tokenizers/punkt_tab')
-    except LookupError:
-        nltk.download('punkt_tab', quiet=True)
+    from blingfire import text_to_sentences
 except ImportError:
-    sent_tokenize = None
+    text_to_sentences = None
 
-from ..schemas.summary_schema import SummaryStyle
+# Sentence boundary used when BlingFire is unavailable
+_SENT_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Preprocessing patterns
+_CTRL_CHARS_RE = re.compile(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]')
+_PUNCT_RUN_RE = re.compile(r'[.!?][.!?]+')  # no repeated group, so runs are matched in C
+_SENT_END_RE = re.compile(r'[.!?]+')
+
+# Byte-level word counting for long ASCII text; the same characters \s matches
+_ASCII_SPACE = np.zeros(256, dtype=bool)
+_ASCII_SPACE[[0x09, 0x0a, 0x0b, 0x0c, 0x0d, 0x1c, 0x1d, 0x1e, 0x1f, 0x20]] = True
+_NUMPY_WORD_COUNT_MIN = 4096  # characters; below this str.split is faster
+
+
+def count_words(text: str) -> int:
+    """Count whitespace-separated words, scanning bytes with numpy for long ASCII text."""
+    if len(text) >= _NUMPY_WORD_COUNT_MIN and text.isascii():
+        is_space = _ASCII_SPACE[np.frombuffer(text.encode('ascii'), dtype=np.uint8)]
+        # A word starts at every non-space byte that follows a space (or the start)
+        starts = np.count_nonzero(is_space[:-1] & ~is_space[1:])
+        return int(starts) + (not is_space[0])
+    return len(text.split())
+
+
+class ModelError(HTTPException):
+    """An error the model returned for a request's inputs, rather than a network failure."""
 
-load_dotenv()
+
+def _last_char(match) -> str:
+    """Collapse a punctuation run to its final mark."""
+    return match.group()[-1]
+
+
+@lru_cache(maxsize=512)
+def _cached_sent_split(text: str) -> tuple:
+    """Split text into sentences, caching the result for repeated inputs."""
+    if text_to_sentences:
+        # BlingFire returns one sentence per line
+        return tuple(s.strip() for s in text_to_sentences(text).split('\n') if s.strip())
+    # Like BlingFire, turn line breaks inside a sentence into spaces
+    sentences = _SENT_SPLIT_RE.split(text)
+    return tuple(s.strip().replace('\n', ' ') for s in sentences if s.strip())
 
 
 class LLMService:
     """
-    Simplified LLM Summarization Service using BART-CNN with direct HTTP requests.
+    Simplified LLM Summarization Service using BART-CNN over a pooled async HTTP client.
     """
     
+    # Responses worth retrying: rate limited, model loading, gateway timeout
+    RETRY_STATUS_CODES = frozenset({429, 503, 504})
+    # Statuses that mean the inputs were rejected, so retrying inputs one by one can help
+    INPUT_ERROR_STATUS_CODES = frozenset({400, 413, 422})
+    FIRST_READ_TIMEOUT = 15.0  # near BART-CNN's typical latency; used until latencies are observed
+    MIN_READ_TIMEOUT = 5.0
+    LATENCY_WINDOW = 50  # recent successful calls per preset used for the adaptive timeout
+    MAX_BACKOFF = 8.0
+    
+    # Leading sentences returned for inputs too short for BART to condense. Only
+    # these presets have a min_length above the 50-word input minimum, so only
+    # they can ever take the shortcut
+    EXTRACTIVE_SENTENCES = {"bullet": 3, "detailed": 4}
+    
+    # BART preset used for each summary style
+    STYLE_PRESETS = {
+        SummaryStyle.BRIEF: "brief",
+        SummaryStyle.DETAILED: "detailed",
+        SummaryStyle.BULLET: "bullet",
+        SummaryStyle.STANDARD: "standard",
+        SummaryStyle.CUSTOM: "standard",  # BART has no prompt input
+    }
+    
     def __init__(self):
         self.hf_token = os.getenv("HF_TOKEN")
         self.model = "facebook/bart-large-cnn"
@@ -38,6 +104,18 @@ class LLMService:
             "Content-Type": "application/json"
         } if self.hf_token else {"Content-Type": "application/json"}
         
+        # Pooled HTTP client, created in startup() once the event loop is running
+        self._client = None
+        
+        # (sha256 of preprocessed text, preset) -> BART summary
+        self._response_cache = LRUCache(maxsize=512)
+        
+        # blake2b of raw text -> preprocessed text (only successful runs are stored)
+        self._preprocess_cache = LRUCache(maxsize=256)
+        
+        # preset -> recent successful HF call durations in seconds, per input in the call
+        self._latency = {}
+        
         # Input validation
         self.text_area_min_words = 50  # Reduced from 150 for better UX
         self.text_area_max_words = 1500
@@ -79,15 +157,33 @@ class LLMService:
             }
         }
 
+        # Parameters never change per preset, so serialize them once
+        self._preset_params_json = {name: orjson.dumps(params) for name, params in self.presets.items()}
+
         if not self.hf_token:
             print("Warning: HF_TOKEN not found in environment variables.")
 
-    def _validate_input(self, text: str, is_file_upload: bool = False):
-        """Validate input based on source."""
+    async def startup(self):
+        """Create the pooled HTTP client so connections (and TLS sessions) are reused."""
+        self._client = httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+        )
+
+    async def shutdown(self):
+        """Close the pooled HTTP client, if startup() created one."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _validate_input(self, text: str, is_file_upload: bool = False) -> int:
+        """Validate input based on source and return its word count."""
         if not text or not text.strip():
             raise HTTPException(status_code=400, detail="Text cannot be empty")
         
-        word_count = len(text.split())
+        word_count = count_words(text)
         
         if is_file_upload:
             min_words = self.file_upload_min_words
@@ -109,17 +205,36 @@ class LLMService:
                 status_code=400,
                 detail=f"{source}: Text too long. Maximum {max_words} words allowed. Your text has {word_count} words."
             )
+        
+        # Preprocessing ends the text with punctuation, so fewer than two marks
+        # can never make 3 sentences; reject before running the regex passes
+        if text.count('.') + text.count('!') + text.count('?') < 2:
+            raise self._too_few_sentences()
+        
+        return word_count
+
+    def _too_few_sentences(self) -> HTTPException:
+        return HTTPException(
+            status_code=400,
+            detail="Text must contain at least 3 complete sentences for summarization."
+        )
 
     def _preprocess_text(self, text: str) -> str:
         """Clean and preprocess text for summarization."""
+        # Resubmitting the same text (retries, another style) skips the regex passes
+        key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        clean_text = self._preprocess_cache.get(key)
+        if clean_text is not None:
+            return clean_text
+        
         # Remove excessive whitespace and normalize
-        text = re.sub(r'\s+', ' ', text)
+        text = ' '.join(text.split())
         
         # Remove special characters that might cause issues
-        text = re.sub(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+        text = _CTRL_CHARS_RE.sub('', text)
         
         # Remove multiple consecutive punctuation
-        text = re.sub(r'([.!?]){2,}', r'\1', text)
+        text = _PUNCT_RUN_RE.sub(_last_char, text)
         
         # Ensure text ends with proper punctuation
         text = text.strip()
@@ -128,161 +243,292 @@ class LLMService:
         
         # Ensure minimum sentence structure
         # BART needs at least a few sentences to work properly
-        sentences = re.split(r'[.!?]+', text)
+        sentences = _SENT_END_RE.split(text)
         sentences = [s.strip() for s in sentences if s.strip()]
         
         if len(sentences) < 3:
-            raise HTTPException(
-                status_code=400,
-                detail="Text must contain at least 3 complete sentences for summarization."
-            )
+            raise self._too_few_sentences()
         
+        self._preprocess_cache[key] = text
         return text
 
-    def _split_into_sentences(self, text: str):
-        """Split text into sentences using NLTK or fallback regex."""
-        if sent_tokenize:
-            return sent_tokenize(text)
-        else:
-            sentences = re.split(r'(?<=[.!?])\s+', text)
-            return [s.strip() for s in sentences if s.strip()]
+    def _preset_for_style(self, style: SummaryStyle) -> str:
+        """Map a summary style to its BART preset."""
+        return self.STYLE_PRESETS[style]
 
-    def _hf_summarize(self, text: str, preset: str, timeout: int = 60) -> str:
+    def _prepare_text(self, text: str, word_count: int = None) -> tuple:
         """
-        Summarize text using HuggingFace Inference API with the chosen preset.
-        """
-        if preset not in self.presets:
-            raise ValueError(f"Unknown preset '{preset}'. Choose one of: {list(self.presets)}")
+        Preprocess text and make sure enough content is left for BART.
+        Returns the cleaned text and its word count.
         
-        # Preprocess text
+        ``word_count`` is the count from validation; it still holds after
+        preprocessing unless control characters were stripped.
+        """
         clean_text = self._preprocess_text(text)
         
+        if word_count is None or _CTRL_CHARS_RE.search(text):
+            word_count = count_words(clean_text)
+        
         # Check if text is too short after cleaning
-        if len(clean_text.split()) < 30:
+        if word_count < 30:
             raise HTTPException(
                 status_code=400,
                 detail="Text is too short after preprocessing. Please provide more content."
             )
         
-        payload = {
-            "inputs": clean_text,
-            "parameters": self.presets[preset]
-        }
+        return clean_text, word_count
+
+    def _retry_after(self, resp: httpx.Response, timeout: float):
+        """Seconds to wait from a Retry-After header, or None if absent or not numeric."""
+        try:
+            return min(float(resp.headers["Retry-After"]), timeout)
+        except (KeyError, ValueError):
+            return None
+
+    def _first_read_timeout(self, preset: str, batch_size: int, timeout: float) -> float:
+        """
+        Read timeout for a first attempt: twice the preset's recent median latency
+        per input, scaled to the batch size and kept within bounds.
+        """
+        latency = self._latency.get(preset)
+        if not latency:
+            return min(self.FIRST_READ_TIMEOUT, timeout)
+        estimate = 2 * statistics.median(latency) * batch_size
+        return max(self.MIN_READ_TIMEOUT, min(timeout, estimate))
+
+    async def _post_with_retry(self, body: bytes, preset: str, batch_size: int, *, timeout: float = 60.0, max_retries: int = 2) -> httpx.Response:
+        """
+        POST a JSON body to the HuggingFace Inference API, retrying stuck or failed calls.
         
+        Timeouts, connection errors and 429/503/504 responses are retried with
+        jittered exponential backoff (or the server's Retry-After). The read
+        timeout starts from recent call durations for ``preset`` (see
+        _first_read_timeout) and doubles per attempt, up to ``timeout``. The
+        last error is raised once retries run out.
+        """
+        first_read_timeout = self._first_read_timeout(preset, batch_size, timeout)
+        for attempt in range(max_retries + 1):
+            read_timeout = min(first_read_timeout * 2 ** attempt, timeout)
+            delay = None
+            try:
+                start = time.perf_counter()
+                resp = await self._client.post(
+                    self.api_url, content=body, timeout=httpx.Timeout(read_timeout, connect=5.0)
+                )
+                if resp.status_code not in self.RETRY_STATUS_CODES or attempt == max_retries:
+                    resp.raise_for_status()
+                    latency = self._latency.setdefault(preset, deque(maxlen=self.LATENCY_WINDOW))
+                    latency.append((time.perf_counter() - start) / batch_size)
+                    return resp
+                delay = self._retry_after(resp, timeout)
+                reason = f"HTTP {resp.status_code}"
+            except httpx.TransportError as e:
+                if attempt == max_retries:
+                    raise
+                reason = type(e).__name__
+            
+            if delay is None:
+                delay = min(2 ** attempt, self.MAX_BACKOFF) * random.uniform(0.5, 1.5)
+            print(f"HF request attempt {attempt + 1} failed ({reason}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _hf_request(self, body: bytes, preset: str, batch_size: int, timeout: float = 60.0):
+        """
+        POST a JSON body to the HuggingFace Inference API and return the decoded response.
+        """
         try:
-            resp = requests.post(self.api_url, headers=self.headers, json=payload, timeout=timeout)
-            resp.raise_for_status()
-        except Timeout:
+            resp = await self._post_with_retry(body, preset, batch_size, timeout=timeout)
+        except httpx.TimeoutException:
             raise HTTPException(
                 status_code=504,
                 detail="Request timed out. Try with shorter text."
             )
-        except HTTPError as e:
-            content = resp.text if 'resp' in locals() else "<no response body>"
+        except httpx.HTTPStatusError as e:
+            resp = e.response
             # Parse error message for better user feedback
-            error_msg = content
+            error_msg = resp.text
             try:
-                error_data = resp.json()
+                error_data = orjson.loads(resp.content)
                 if isinstance(error_data, dict) and 'error' in error_data:
                     error_msg = error_data['error']
             except:
                 pass
             
+            if resp.status_code in self.INPUT_ERROR_STATUS_CODES:
+                raise ModelError(
+                    status_code=502,
+                    detail=f"Model error: {error_msg}. Try with different text or shorter content."
+                )
+            # Rate limits, auth failures and outages are not caused by the text
             raise HTTPException(
                 status_code=502,
-                detail=f"Model error: {error_msg}. Try with different text or shorter content."
+                detail=f"HF Inference API error ({resp.status_code}): {error_msg}"
             )
-        except RequestException as e:
+        except httpx.RequestError as e:
             raise HTTPException(
                 status_code=502,
                 detail=f"Network error calling HF Inference API: {e}"
             )
         
-        data = resp.json()
+        data = orjson.loads(resp.content)
         
         # Handle HF error responses
         if isinstance(data, dict) and data.get("error"):
             error_msg = data['error']
             # Provide user-friendly error messages
             if "index out of range" in error_msg.lower():
-                raise HTTPException(
+                raise ModelError(
                     status_code=400,
                     detail="Text format issue. Please ensure your text has proper sentences and punctuation."
                 )
-            raise HTTPException(
+            raise ModelError(
                 status_code=502,
                 detail=f"Model error: {error_msg}"
             )
         
-        # Extract summary from response
-        if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
-            summary = data[0].get("summary_text") or data[0].get("generated_text") or str(data[0])
+        return data
+
+    def _extract_summary(self, item) -> str:
+        """Pull the summary text out of a single HF result entry."""
+        if isinstance(item, dict):
+            summary = item.get("summary_text") or item.get("generated_text") or str(item)
             return summary.strip()
         
         # Fallback
-        return str(data)
+        return str(item)
+
+    def _extractive_summary(self, clean_text: str, preset: str, word_count: int):
+        """
+        Return the leading sentences of text shorter than the preset's min_length,
+        which BART cannot condense, or None if the text needs the model.
+        """
+        if preset not in self.EXTRACTIVE_SENTENCES or word_count >= self.presets[preset]["min_length"]:
+            return None
+        
+        print(f"Short input ({word_count} words): skipping HF call for '{preset}' preset")
+        sentences = _cached_sent_split(clean_text)
+        return ' '.join(sentences[:self.EXTRACTIVE_SENTENCES[preset]])
+
+    async def _hf_summarize_batch(self, clean_texts: list, preset: str, timeout: float = 60.0) -> list:
+        """
+        Summarize several preprocessed texts with a single HuggingFace Inference API call.
+        Texts already summarized with this preset are served from the response cache.
+        """
+        if preset not in self.presets:
+            raise ValueError(f"Unknown preset '{preset}'. Choose one of: {list(self.presets)}")
+        
+        keys = [(hashlib.sha256(clean_text.encode()).digest(), preset) for clean_text in clean_texts]
+        summaries = [self._response_cache.get(key) for key in keys]
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        if not missing:
+            return summaries
+        
+        # Splice the inputs into the preset's pre-serialized parameters
+        body = (
+            b'{"inputs":' + orjson.dumps([clean_texts[i] for i in missing])
+            + b',"parameters":' + self._preset_params_json[preset] + b'}'
+        )
+        data = await self._hf_request(body, preset, len(missing), timeout)
+        
+        if not isinstance(data, list) or len(data) != len(missing):
+            raise HTTPException(
+                status_code=502,
+                detail="Model error: unexpected response for batched request."
+            )
+        
+        for i, item in zip(missing, data):
+            # Batched responses may nest each result in its own list
+            summary = self._extract_summary(item[0] if isinstance(item, list) and item else item)
+            self._response_cache[keys[i]] = summary
+            summaries[i] = summary
+        
+        return summaries
 
     def _format_as_bullets(self, text: str) -> str:
-        """Format text as bullet points using NLTK."""
-        sentences = self._split_into_sentences(text)
+        """Format text as bullet points using BlingFire."""
+        if text_to_sentences:
+            # One sentence per line; strip the ends so every line just needs a prefix
+            sentences = text_to_sentences(text).strip()
+            return '• ' + sentences.replace('\n', '\n• ') if sentences else text
+        
+        sentences = _cached_sent_split(text)
         
         if not sentences:
             return text
         
-        bullets = [f"• {sentence.strip()}" for sentence in sentences if sentence.strip()]
-        return '\n'.join(bullets)
+        return '• ' + '\n• '.join(sentences)
 
-    def summarize(self, text: str, style: SummaryStyle, custom_prompt: str = None, is_file_upload: bool = False) -> str:
+    async def summarize_batch(self, texts: list, styles: list, custom_prompts: list = None, is_file_uploads: list = None) -> list:
         """
-        Main summarization method.
+        Summarize several inputs at once, sharing one HF request per preset.
+        Requests for different presets run concurrently.
         
         Args:
-            text: Input text to summarize
-            style: Summarization style (brief, detailed, bullet_points, standard, custom)
-            custom_prompt: Custom instruction (not used with BART-only)
-            is_file_upload: True if from file upload, False if from text area
+            texts: Input texts to summarize
+            styles: Summarization style for each text
+            custom_prompts: Custom instruction for each text (not used with BART-only)
+            is_file_uploads: Source flag for each text (True for file uploads)
             
         Returns:
-            Summarized text
+            List aligned with ``texts`` holding either the summary or the
+            HTTPException raised for that input
         """
-        # Validate input
-        self._validate_input(text, is_file_upload)
-
-        if not self.hf_token:
-            raise HTTPException(
-                status_code=500, 
-                detail="HuggingFace token not available. Please set HF_TOKEN in .env"
-            )
-
-        try:
-            # Map style to preset
-            if style == SummaryStyle.BRIEF:
-                preset = "brief"
-            elif style == SummaryStyle.DETAILED:
-                preset = "detailed"
-            elif style == SummaryStyle.BULLET:
-                preset = "bullet"
-            else:  # STANDARD or CUSTOM
-                preset = "standard"
-            
-            # Generate summary with BART
-            summary = self._hf_summarize(text, preset)
-            
-            # Format as bullets if needed
-            if style == SummaryStyle.BULLET:
-                summary = self._format_as_bullets(summary)
-            
-            return summary
+        if is_file_uploads is None:
+            is_file_uploads = [False] * len(texts)
+        
+        results = [None] * len(texts)
+        groups = {}  # preset -> [(index, clean_text)]
+        
+        for i, (text, style, is_file_upload) in enumerate(zip(texts, styles, is_file_uploads)):
+            try:
+                word_count = self._validate_input(text, is_file_upload)
+                if not self.hf_token:
+                    raise HTTPException(
+                        status_code=500, 
+                        detail="HuggingFace token not available. Please set HF_TOKEN in .env"
+                    )
+                clean_text, word_count = self._prepare_text(text, word_count)
+            except HTTPException as e:
+                results[i] = e
+                continue
             
-        except HTTPException:
-            raise
-        except Exception as e:
-            print(f"Summarization error: {type(e).__name__}: {str(e)}")
-            raise HTTPException(
-                status_code=502, 
-                detail=f"Failed to generate summary: {str(e)}"
-            )
-
-
-# Singleton instance
-llm_service = LLMService()
+            preset = self._preset_for_style(style)
+            summary = self._extractive_summary(clean_text, preset, word_count)
+            if summary is not None:
+                results[i] = self._format_as_bullets(summary) if style == SummaryStyle.BULLET else summary
+                continue
+            groups.setdefault(preset, []).append((i, clean_text))
+        
+        async def run_group(preset, clean_texts):
+            try:
+                return await self._hf_summarize_batch(clean_texts, preset)
+            except ModelError as e:
+                if len(clean_texts) > 1:
+                    # The model may have rejected a single input; retry each alone so only that request fails
+                    print(f"Batch of {len(clean_texts)} failed ({e.detail}), retrying inputs one by one")
+                    retried = await asyncio.gather(*(run_group(preset, [clean_text]) for clean_text in clean_texts))
+                    return [summaries[0] for summaries in retried]
+                error = e
+            except HTTPException as e:
+                error = e
+            except Exception as e:
+                print(f"Summarization error: {type(e).__name__}: {str(e)}")
+                error = HTTPException(
+                    status_code=502, 
+                    detail=f"Failed to generate summary: {str(e)}"
+                )
+            # Each request raises its own exception object
+            return [HTTPException(status_code=error.status_code, detail=error.detail) for _ in clean_texts]
+        
+        group_summaries = await asyncio.gather(
+            *(run_group(preset, [clean_text for _, clean_text in items]) for preset, items in groups.items())
+        )
+        
+        for items, summaries in zip(groups.values(), group_summaries):
+            for (i, _), summary in zip(items, summaries):
+                # Format as bullets if needed
+                if isinstance(summary, str) and styles[i] == SummaryStyle.BULLET:
+                    summary = self._format_as_bullets(summary)
+                results[i] = summary
+        
+        return results
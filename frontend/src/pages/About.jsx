@@ -62,7 +62,7 @@ function About() {
                     <li><strong>Backend:</strong> FastAPI (Python)</li>
                     <li><strong>Frontend:</strong> React with React Router</li>
                     <li><strong>AI Model:</strong> HuggingFace BART-large-cnn</li>
-                    <li><strong>NLP:</strong> NLTK for sentence tokenization</li>
+                    <li><strong>NLP:</strong> BlingFire for sentence tokenization</li>
                 </ul>
             </section>
         </div>
@@ -5,10 +5,26 @@ Tests all endpoints, styles, file uploads, and edge cases
 """
 
 import requests
+import json
 import os
+import statistics
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "http://localhost:8000/api"
+MAX_WORKERS = 4
+PERF_RUNS = 5
+PERF_OUTPUT = "perf.json"  # kept out of test_data, which holds only fixtures
+
+# requests.Session is not guaranteed to be thread-safe, so each thread keeps its own
+_thread_local = threading.local()
+
+def get_session():
+    """Return this thread's session, reused so its keep-alive connections are too."""
+    if not hasattr(_thread_local, "session"):
+        _thread_local.session = requests.Session()
+    return _thread_local.session
 
 def print_header(title):
     print("\n" + "="*80)
@@ -38,7 +54,7 @@ def test_health_check():
     """Test API health endpoint"""
     print_header("1. HEALTH CHECK")
     try:
-        response = requests.get(f"{BASE_URL}/health")
+        response = get_session().get(f"{BASE_URL}/health")
         if response.status_code == 200:
             print(f"✓ API is running: {response.json()}")
             return True
@@ -56,7 +72,7 @@ def test_input_validation():
     # Test 1: Text too short
     print("\nTest 2.1: Text too short (< 150 words)")
     short_text = "AI is transforming the world. " * 10  # ~70 words
-    response = requests.post(
+    response = get_session().post(
         f"{BASE_URL}/summarize",
         json={"text": short_text, "style": "brief"}
     )
@@ -68,7 +84,7 @@ def test_input_validation():
     # Test 2: Text too long for text area
     print("\nTest 2.2: Text too long (> 1500 words)")
     long_text = SAMPLE_TEXT * 5  # ~2250 words
-    response = requests.post(
+    response = get_session().post(
         f"{BASE_URL}/summarize",
         json={"text": long_text, "style": "brief"}
     )
@@ -79,7 +95,7 @@ def test_input_validation():
     
     # Test 3: Valid text
     print("\nTest 2.3: Valid text (150-1500 words)")
-    response = requests.post(
+    response = get_session().post(
         f"{BASE_URL}/summarize",
         json={"text": SAMPLE_TEXT, "style": "brief"}
     )
@@ -100,16 +116,21 @@ def test_all_styles():
         ("bullet_points", "Formatted as bullets"),
     ]
     
-    for style, description in styles:
+    # Send all styles at once; map() keeps results in order for printing
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        responses = list(executor.map(
+            lambda style: get_session().post(
+                f"{BASE_URL}/summarize",
+                json={"text": SAMPLE_TEXT, "style": style}
+            ),
+            [style for style, _ in styles]
+        ))
+    
+    for (style, description), response in zip(styles, responses):
         print(f"\nTest 3.{styles.index((style, description)) + 1}: {style.upper()}")
         print(f"Description: {description}")
         print_separator()
         
-        response = requests.post(
-            f"{BASE_URL}/summarize",
-            json={"text": SAMPLE_TEXT, "style": style}
-        )
-        
         if response.status_code == 200:
             result = response.json()
             compression = result['word_count'] / word_count * 100
@@ -135,7 +156,7 @@ def test_custom_styles():
         print(f"Prompt: {prompt}")
         print_separator()
         
-        response = requests.post(
+        response = get_session().post(
             f"{BASE_URL}/summarize",
             json={
                 "text": SAMPLE_TEXT,
@@ -167,8 +188,26 @@ def test_file_uploads():
         ("test_data/config.json", "brief", "JSON file"),
     ]
     
+    def upload(filepath, style):
+        with open(filepath, 'rb') as f:
+            files = {'file': f}
+            data = {'style': style}
+            return get_session().post(
+                f"{BASE_URL}/summarize-file",
+                files=files,
+                data=data
+            )
+    
+    # Upload all files at once, then report them in order
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            filepath: executor.submit(upload, filepath, style)
+            for filepath, style, _ in test_files
+            if os.path.exists(filepath)
+        }
+    
     for filepath, style, description in test_files:
-        if not os.path.exists(filepath):
+        if filepath not in futures:
             print(f"\n⚠ {filepath} not found, skipping")
             continue
         
@@ -177,14 +216,7 @@ def test_file_uploads():
         print_separator()
         
         try:
-            with open(filepath, 'rb') as f:
-                files = {'file': f}
-                data = {'style': style}
-                response = requests.post(
-                    f"{BASE_URL}/summarize-file",
-                    files=files,
-                    data=data
-                )
+            response = futures[filepath].result()
             
             if response.status_code == 200:
                 result = response.json()
@@ -209,7 +241,7 @@ def test_chunking():
     
     # This should fail validation for text area but would work for file upload
     print("Testing with text area (should fail - max 1500 words):")
-    response = requests.post(
+    response = get_session().post(
         f"{BASE_URL}/summarize",
         json={"text": long_text, "style": "brief"}
     )
@@ -225,7 +257,7 @@ def test_error_handling():
     
     # Test 1: Missing text
     print("\nTest 7.1: Missing text")
-    response = requests.post(
+    response = get_session().post(
         f"{BASE_URL}/summarize",
         json={"style": "brief"}
     )
@@ -236,7 +268,7 @@ def test_error_handling():
     
     # Test 2: Invalid style
     print("\nTest 7.2: Invalid style")
-    response = requests.post(
+    response = get_session().post(
         f"{BASE_URL}/summarize",
         json={"text": SAMPLE_TEXT, "style": "invalid_style"}
     )
@@ -247,7 +279,7 @@ def test_error_handling():
     
     # Test 3: Custom style without prompt
     print("\nTest 7.3: Custom style without prompt")
-    response = requests.post(
+    response = get_session().post(
         f"{BASE_URL}/summarize",
         json={"text": SAMPLE_TEXT, "style": "custom"}
     )
@@ -260,24 +292,40 @@ def test_performance():
     """Test API performance"""
     print_header("8. PERFORMANCE")
     
-    print("\nTest 8.1: Response time for brief summary")
-    start = time.time()
-    response = requests.post(
-        f"{BASE_URL}/summarize",
-        json={"text": SAMPLE_TEXT, "style": "brief"}
-    )
-    elapsed = time.time() - start
+    print(f"\nTest 8.1: Response time for brief summary (median of {PERF_RUNS} runs)")
+    timings_ms = []
+    for run in range(PERF_RUNS):
+        # A different sentence each run keeps the server's summary cache out of the timing
+        text = SAMPLE_TEXT + f" This is performance run number {run + 1}."
+        start = time.perf_counter_ns()
+        response = get_session().post(
+            f"{BASE_URL}/summarize",
+            json={"text": text, "style": "brief"}
+        )
+        elapsed_ms = (time.perf_counter_ns() - start) / 1e6
+        
+        if response.status_code != 200:
+            print(f"✗ Failed")
+            return
+        timings_ms.append(elapsed_ms)
     
-    if response.status_code == 200:
-        print(f"✓ Completed in {elapsed:.2f}s")
-        if elapsed < 10:
-            print("  Performance: Good")
-        elif elapsed < 20:
-            print("  Performance: Acceptable")
-        else:
-            print("  Performance: Slow (consider optimization)")
+    p50_ms = statistics.median(timings_ms)
+    elapsed = p50_ms / 1000
+    print(f"✓ Completed in {elapsed:.2f}s (min {min(timings_ms) / 1000:.2f}s, max {max(timings_ms) / 1000:.2f}s)")
+    if elapsed < 10:
+        print("  Performance: Good")
+    elif elapsed < 20:
+        print("  Performance: Acceptable")
     else:
-        print(f"✗ Failed")
+        print("  Performance: Slow (consider optimization)")
+    
+    # Save the timings so runs can be compared for regressions
+    with open(PERF_OUTPUT, "w") as f:
+        json.dump({
+            "brief_p50_ms": round(p50_ms, 1),
+            "brief_runs_ms": [round(t, 1) for t in timings_ms]
+        }, f, indent=2)
+    print(f"  Timings saved to {PERF_OUTPUT}")
 
 def run_all_tests():
     """Run all test suites"""